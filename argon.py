@@ -28,11 +28,16 @@ print(f"Python path: {sys.path}", file=sys.stderr)
 
 try:
     # Standard library imports
+    import asyncio
     import atexit
-    from datetime import datetime
     from enum import Enum
+    from functools import lru_cache
     from pathlib import Path
+    import re
+    import shutil
     import subprocess
+    import threading
+    import time
     from typing import Dict, Optional, Tuple
     import logging
     import traceback
@@ -46,9 +51,7 @@ try:
     print("Attempting to import MCP...", file=sys.stderr)
     from mcp.server.fastmcp import FastMCP
     print("Successfully imported MCP", file=sys.stderr)
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    from selenium.common.exceptions import TimeoutException, WebDriverException
+    from selenium.common.exceptions import NoSuchElementException, WebDriverException
     print("Successfully imported all dependencies", file=sys.stderr)
 
 except ImportError as e:
@@ -62,11 +65,34 @@ logger = logging.getLogger(__name__)
 
 print("Starting server initialization...", file=sys.stderr)
 
+# ideviceinfo keys read during device detection
+DEVICE_INFO_KEYS = frozenset({'UniqueDeviceID', 'DeviceName', 'ProductVersion', 'ProductType'})
+
+@lru_cache(maxsize=None)
+def resolve_command(command: str) -> Optional[str]:
+    """Resolve a command to its absolute path on PATH, or None if missing. Results are cached for the process lifetime."""
+    return shutil.which(command)
+
+# Simple XPath shapes that have an exact iOS class chain equivalent
+_SIMPLE_XPATH = re.compile(r"""^//(XCUIElementType\w+)(?:\[@(name|label|value)=(['"])([^'"`\\]*)\3\])?$""")
+
 class LocatorStrategy(str, Enum):
     ACCESSIBILITY_ID = "accessibility_id"
     XPATH = "xpath"
     NAME = "name"
     CLASS_NAME = "class_name"
+    IOS_CLASS_CHAIN = "ios_class_chain"
+    IOS_PREDICATE = "ios_predicate"
+
+# Appium strategy for each tool locator strategy
+LOCATOR_MAP = {
+    LocatorStrategy.ACCESSIBILITY_ID: AppiumBy.ACCESSIBILITY_ID,
+    LocatorStrategy.XPATH: AppiumBy.XPATH,
+    LocatorStrategy.NAME: AppiumBy.NAME,
+    LocatorStrategy.CLASS_NAME: AppiumBy.CLASS_NAME,
+    LocatorStrategy.IOS_CLASS_CHAIN: AppiumBy.IOS_CLASS_CHAIN,
+    LocatorStrategy.IOS_PREDICATE: AppiumBy.IOS_PREDICATE
+}
 
 class PhysicalButton(str, Enum):
     HOME = "home"
@@ -80,44 +106,77 @@ class SwipeDirection(str, Enum):
     LEFT = "left"
     RIGHT = "right"
 
+# Swipe start and end points for each direction, as fractions of the screen size
+SWIPE_FRACTIONS = {
+    SwipeDirection.UP: (0.5, 0.7, 0.5, 0.3),
+    SwipeDirection.DOWN: (0.5, 0.3, 0.5, 0.7),
+    SwipeDirection.LEFT: (0.8, 0.5, 0.2, 0.5),
+    SwipeDirection.RIGHT: (0.2, 0.5, 0.8, 0.5)
+}
+
 class IOSDriver:
-    _instances = set()
+    _instances = weakref.WeakSet()
     
     def __init__(self):
         self.driver = None
         self.device_info = None
+        # Screen size of the current session, fetched on first use
+        self._window_size: Optional[Dict[str, int]] = None
         # Add self to the set of instances
-        self._instances.add(weakref.ref(self))
+        self._instances.add(self)
         logger.debug("IOSDriver instance created")
     
     @classmethod
     def _cleanup_all(cls):
-        """Clean up all driver instances."""
+        """Clean up all driver instances, quitting their sessions in parallel."""
         logger.info("Cleaning up all driver instances")
-        for instance_ref in cls._instances:
-            instance = instance_ref()
-            if instance is not None:
-                try:
-                    instance.cleanup()
-                except Exception as e:
-                    logger.error(f"Error cleaning up instance: {str(e)}")
+        # This runs from atexit, where ThreadPoolExecutor no longer accepts work,
+        # so fan out with plain threads
+        started = []
+        remaining = list(cls._instances)
+        try:
+            while remaining:
+                thread = threading.Thread(target=cls._cleanup_instance, args=(remaining[0],))
+                thread.start()
+                started.append(thread)
+                remaining.pop(0)
+        except RuntimeError:
+            # Python 3.12.0 and 3.12.1 refuse to start threads at interpreter shutdown,
+            # so clean up whatever is left serially
+            logger.debug("Cannot start cleanup threads at shutdown, cleaning up serially")
+            for instance in remaining:
+                cls._cleanup_instance(instance)
+        for thread in started:
+            thread.join()
+    
+    @staticmethod
+    def _cleanup_instance(instance: "IOSDriver"):
+        """Clean up a single driver instance, logging rather than raising errors."""
+        try:
+            instance.cleanup()
+        except Exception as e:
+            logger.error(f"Error cleaning up instance: {str(e)}")
     
     def detect_real_device(self) -> Optional[Dict[str, str]]:
         """Detect connected iOS device using libimobiledevice."""
+        ideviceinfo = resolve_command('ideviceinfo')
+        if not ideviceinfo:
+            logger.debug("ideviceinfo not found, skipping real device detection")
+            return None
+            
         try:
             # Run ideviceinfo to get device information
-            result = subprocess.run(['ideviceinfo'], capture_output=True, text=True)
+            result = subprocess.run([ideviceinfo], capture_output=True, text=True, close_fds=False, timeout=10)
             if result.returncode != 0:
                 logger.debug("No iOS device detected with ideviceinfo")
                 return None
                 
-            # Parse the output to get device details
-            lines = result.stdout.strip().split('\n')
+            # Parse the output, keeping only the top-level keys we use
             device_info = {}
-            for line in lines:
-                if ': ' in line:
-                    key, value = line.split(': ', 1)
-                    device_info[key.strip()] = value.strip()
+            for line in result.stdout.splitlines():
+                key, sep, value = line.partition(': ')
+                if sep and key in DEVICE_INFO_KEYS:
+                    device_info[key] = value.strip()
             
             # Extract relevant information
             if 'UniqueDeviceID' in device_info:
@@ -155,6 +214,9 @@ class IOSDriver:
         options.platform_name = "iOS"
         options.automation_name = "XCUITest"
         
+        # Bound how deep WDA walks the accessibility tree for page source and lookups
+        options.set_capability("appium:settings[snapshotMaxDepth]", 30)
+        
         # Use detected device info if available, otherwise use defaults
         if self.device_info:
             logger.info("Using detected real device configuration")
@@ -184,7 +246,8 @@ class IOSDriver:
         
         try:
             logger.debug(f"Connecting to Appium server at http://localhost:4723")
-            logger.debug(f"Using options: {options.to_capabilities()}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Using options: {options.to_capabilities()}")
             
             # Create the driver with options
             self.driver = webdriver.Remote(command_executor='http://localhost:4723', options=options)
@@ -197,9 +260,15 @@ class IOSDriver:
             return True
         except Exception as e:
             logger.error(f"Failed to initialize iOS driver: {str(e)}")
-            logger.debug(f"Stack trace: {traceback.format_exc()}")
+            logger.debug("Stack trace:", exc_info=True)
             return False
 
+    def get_window_size(self) -> Dict[str, int]:
+        """Get the screen size, which is fixed for the lifetime of a session."""
+        if self._window_size is None:
+            self._window_size = self.driver.get_window_size()
+        return self._window_size
+
     def cleanup(self):
         """Clean up the driver instance."""
         logger.info("Cleaning up driver instance")
@@ -210,6 +279,7 @@ class IOSDriver:
                 logger.warning(f"Error during driver cleanup: {str(e)}")
             finally:
                 self.driver = None
+                self._window_size = None
 
     def tap_element(self, **locator):
         """Tap an element identified by the given locator."""
@@ -231,19 +301,22 @@ class IOSDriver:
                 logger.error("Invalid locator format")
                 return False, "Invalid locator format"
                 
+            by = getattr(AppiumBy, locator_type.upper(), None)
+            if by is None:
+                logger.error(f"Unsupported locator type: {locator_type}")
+                return False, f"Unsupported locator type: {locator_type}"
+                
             logger.debug(f"Using locator: {locator_type}={locator_value}")
-            element = WebDriverWait(self.driver, 5).until(
-                EC.presence_of_element_located((AppiumBy.CLASS_NAME, locator.get('class_name')))
-            )
+            element = self.driver.find_element(by=by, value=locator_value)
             element.click()
             logger.info("Successfully tapped element")
             return True, "Successfully tapped element"
-        except TimeoutException:
-            logger.warning(f"Element not found within timeout: {locator}")
-            return False, "Element not found within timeout"
+        except NoSuchElementException:
+            logger.warning(f"Element not found: {locator}")
+            return False, "Element not found"
         except Exception as e:
             logger.error(f"Failed to tap element: {str(e)}")
-            logger.debug(f"Stack trace: {traceback.format_exc()}")
+            logger.debug("Stack trace:", exc_info=True)
             return False, f"Failed to tap element: {str(e)}"
 
     def get_page_source(self):
@@ -257,7 +330,7 @@ class IOSDriver:
             return self.driver.page_source
         except Exception as e:
             logger.error(f"Failed to get page source: {str(e)}")
-            logger.debug(f"Stack trace: {traceback.format_exc()}")
+            logger.debug("Stack trace:", exc_info=True)
             return None
 
 # Register cleanup for all instances
@@ -269,6 +342,20 @@ ios_driver = IOSDriver()
 # Create server
 mcp = FastMCP("Argon")
 
+def xpath_to_class_chain(xpath: str) -> Optional[str]:
+    """
+    Rewrite simple XPath locators such as //XCUIElementTypeButton[@name='OK'] into
+    an iOS class chain query, which WebDriverAgent resolves natively instead of
+    snapshotting the whole tree. Returns None for anything it cannot translate.
+    """
+    match = _SIMPLE_XPATH.match(xpath.strip())
+    if not match:
+        return None
+    element_type, attribute, _, value = match.groups()
+    if attribute is None:
+        return f"**/{element_type}"
+    return f'**/{element_type}[`{attribute} == "{value}"`]'
+
 def init_appium():
     """Initialize connection to Appium server"""
     try:
@@ -281,20 +368,43 @@ def init_appium():
         return True
     except Exception as e:
         logger.error(f"Failed to connect to Appium: {str(e)}")
-        logger.debug(f"Stack trace: {traceback.format_exc()}")
+        logger.debug("Stack trace:", exc_info=True)
         return False
 
-# Initialize Appium connection
-init_appium()
+# Serializes lazy connection so concurrent tool calls cannot start two sessions
+_init_lock = asyncio.Lock()
 
-def check_driver_connection() -> Tuple[bool, str]:
-    """Check if driver is connected and return status."""
+async def check_driver_connection() -> Tuple[bool, str]:
+    """
+    Check if driver is connected and return status.
+    The Appium connection is made lazily on first use so the server starts
+    without waiting on device detection and WebDriverAgent. It runs in a worker
+    thread so the event loop keeps serving other requests meanwhile.
+    """
+    if not ios_driver.driver:
+        async with _init_lock:
+            if not ios_driver.driver:
+                logger.info("No active Appium session, initializing connection")
+                await asyncio.to_thread(init_appium)
+    
+    return get_driver_status()
+
+def get_driver_status() -> Tuple[bool, str]:
+    """Report whether a driver session is active, without trying to create one."""
     if not ios_driver.driver:
         error_msg = "No active Appium session"
         logger.error(error_msg)
         return False, error_msg
     return True, "Driver connected"
 
+def artifact_timestamp() -> str:
+    """
+    Timestamp for artifact filenames, with millisecond precision so captures
+    taken within the same second get distinct names.
+    """
+    seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+    return f"{time.strftime('%Y%m%d_%H%M%S', time.localtime(seconds))}_{nanos // 1_000_000:03d}"
+
 def get_clean_page_source() -> Optional[str]:
     """
     Get the current page source without any cleaning.
@@ -302,8 +412,8 @@ def get_clean_page_source() -> Optional[str]:
     """
     logger.debug("Getting page source (cleaning disabled)")
     
-    driver_status, message = check_driver_connection()
-    if not driver_status:
+    connected, message = get_driver_status()
+    if not connected:
         logger.error(f"Cannot get page source: {message}")
         return None
     
@@ -315,14 +425,14 @@ def get_clean_page_source() -> Optional[str]:
         return page_source
     except Exception as e:
         logger.error(f"Error getting page source: {str(e)}")
-        logger.debug(f"Stack trace: {traceback.format_exc()}")
+        logger.debug("Stack trace:", exc_info=True)
         return None
 
 # Register all Appium tools
 @mcp.tool()
 async def get_page_source_tool() -> str:
     """Get the current page source of the application."""
-    driver_status, message = check_driver_connection()
+    driver_status, message = await check_driver_connection()
     if not driver_status:
         return message
     
@@ -339,7 +449,7 @@ async def get_page_source_tool() -> str:
     except Exception as e:
         error_msg = f"Failed to get page source: {str(e)}"
         logger.error(error_msg)
-        logger.debug(f"Stack trace: {traceback.format_exc()}")
+        logger.debug("Stack trace:", exc_info=True)
         return error_msg
 
 @mcp.tool()
@@ -358,22 +468,21 @@ async def tap_element_tool(element_id: str, by: LocatorStrategy = None) -> str:
         logger.error(error_msg)
         return error_msg
     
-    driver_status, message = check_driver_connection()
+    driver_status, message = await check_driver_connection()
     if not driver_status:
         return message
     
     try:
-        locator_map = {
-            LocatorStrategy.ACCESSIBILITY_ID: AppiumBy.ACCESSIBILITY_ID,
-            LocatorStrategy.XPATH: AppiumBy.XPATH,
-            LocatorStrategy.NAME: AppiumBy.NAME,
-            LocatorStrategy.CLASS_NAME: AppiumBy.CLASS_NAME
-        }
-        
-        by_strategy = locator_map[by] if by else AppiumBy.ACCESSIBILITY_ID
+        by_strategy = LOCATOR_MAP[by] if by else AppiumBy.ACCESSIBILITY_ID
+        locator_value = element_id
+        if by == LocatorStrategy.XPATH:
+            # Prefer a native class chain query when the XPath has an exact equivalent
+            class_chain = xpath_to_class_chain(element_id)
+            if class_chain:
+                by_strategy, locator_value = AppiumBy.IOS_CLASS_CHAIN, class_chain
         
         try:
-            element = ios_driver.driver.find_element(by=by_strategy, value=element_id)
+            element = ios_driver.driver.find_element(by=by_strategy, value=locator_value)
         except Exception as e:
             error_msg = f"Element not found: {str(e)}"
             logger.warning(error_msg)
@@ -392,7 +501,7 @@ async def tap_element_tool(element_id: str, by: LocatorStrategy = None) -> str:
     except Exception as e:
         error_msg = f"Failed to tap element: {str(e)}"
         logger.error(error_msg)
-        logger.debug(f"Stack trace: {traceback.format_exc()}")
+        logger.debug("Stack trace:", exc_info=True)
         return error_msg
 
 @mcp.tool()
@@ -403,7 +512,7 @@ async def press_button_tool(button: PhysicalButton) -> str:
     Args:
         button: The button to press (HOME, VOLUME_UP, VOLUME_DOWN, POWER)
     """
-    driver_status, message = check_driver_connection()
+    driver_status, message = await check_driver_connection()
     if not driver_status:
         return message
     
@@ -416,7 +525,7 @@ async def press_button_tool(button: PhysicalButton) -> str:
     except Exception as e:
         error_msg = f"Failed to press button: {str(e)}"
         logger.error(error_msg)
-        logger.debug(f"Stack trace: {traceback.format_exc()}")
+        logger.debug("Stack trace:", exc_info=True)
         return error_msg
 
 @mcp.tool()
@@ -434,12 +543,12 @@ async def swipe_tool(direction: SwipeDirection = None, start_x: int = None, star
     """
     logger.info(f"Tool called: swipe with direction={direction}, coordinates=({start_x}, {start_y}) to ({end_x}, {end_y})")
     
-    driver_status, message = check_driver_connection()
+    driver_status, message = await check_driver_connection()
     if not driver_status:
         return message
     
     try:
-        window_size = ios_driver.driver.get_window_size()
+        window_size = ios_driver.get_window_size()
         width = window_size['width']
         height = window_size['height']
         
@@ -465,14 +574,8 @@ async def swipe_tool(direction: SwipeDirection = None, start_x: int = None, star
             logger.info(success_msg)
             return success_msg
         else:
-            swipe_params = {
-                SwipeDirection.UP: (width * 0.5, height * 0.7, width * 0.5, height * 0.3),
-                SwipeDirection.DOWN: (width * 0.5, height * 0.3, width * 0.5, height * 0.7),
-                SwipeDirection.LEFT: (width * 0.8, height * 0.5, width * 0.2, height * 0.5),
-                SwipeDirection.RIGHT: (width * 0.2, height * 0.5, width * 0.8, height * 0.5)
-            }
-            
-            start_x, start_y, end_x, end_y = swipe_params[direction]
+            fx1, fy1, fx2, fy2 = SWIPE_FRACTIONS[direction]
+            start_x, start_y, end_x, end_y = width * fx1, height * fy1, width * fx2, height * fy2
             ios_driver.driver.swipe(start_x, start_y, end_x, end_y, 500)
             
             success_msg = f"Successfully performed {direction.value} swipe"
@@ -481,7 +584,7 @@ async def swipe_tool(direction: SwipeDirection = None, start_x: int = None, star
     except Exception as e:
         error_msg = f"Failed to perform swipe: {str(e)}"
         logger.error(error_msg)
-        logger.debug(f"Stack trace: {traceback.format_exc()}")
+        logger.debug("Stack trace:", exc_info=True)
         return error_msg
 
 @mcp.tool()
@@ -501,22 +604,21 @@ async def send_input_tool(element_id: str, text: str, by: LocatorStrategy = None
         logger.error(error_msg)
         return error_msg
     
-    driver_status, message = check_driver_connection()
+    driver_status, message = await check_driver_connection()
     if not driver_status:
         return message
     
     try:
-        locator_map = {
-            LocatorStrategy.ACCESSIBILITY_ID: AppiumBy.ACCESSIBILITY_ID,
-            LocatorStrategy.XPATH: AppiumBy.XPATH,
-            LocatorStrategy.NAME: AppiumBy.NAME,
-            LocatorStrategy.CLASS_NAME: AppiumBy.CLASS_NAME
-        }
-        
-        by_strategy = locator_map[by] if by else AppiumBy.ACCESSIBILITY_ID
+        by_strategy = LOCATOR_MAP[by] if by else AppiumBy.ACCESSIBILITY_ID
+        locator_value = element_id
+        if by == LocatorStrategy.XPATH:
+            # Prefer a native class chain query when the XPath has an exact equivalent
+            class_chain = xpath_to_class_chain(element_id)
+            if class_chain:
+                by_strategy, locator_value = AppiumBy.IOS_CLASS_CHAIN, class_chain
         
         try:
-            element = ios_driver.driver.find_element(by=by_strategy, value=element_id)
+            element = ios_driver.driver.find_element(by=by_strategy, value=locator_value)
         except Exception as e:
             error_msg = f"Element not found: {str(e)}"
             logger.warning(error_msg)
@@ -531,7 +633,7 @@ async def send_input_tool(element_id: str, text: str, by: LocatorStrategy = None
     except Exception as e:
         error_msg = f"Failed to send input: {str(e)}"
         logger.error(error_msg)
-        logger.debug(f"Stack trace: {traceback.format_exc()}")
+        logger.debug("Stack trace:", exc_info=True)
         return error_msg
 
 @mcp.tool()
@@ -542,7 +644,7 @@ async def navigate_tool(url: str) -> str:
     Args:
         url: The URL to navigate to
     """
-    driver_status, message = check_driver_connection()
+    driver_status, message = await check_driver_connection()
     if not driver_status:
         return message
     
@@ -555,7 +657,7 @@ async def navigate_tool(url: str) -> str:
     except Exception as e:
         error_msg = f"Failed to navigate: {str(e)}"
         logger.error(error_msg)
-        logger.debug(f"Stack trace: {traceback.format_exc()}")
+        logger.debug("Stack trace:", exc_info=True)
         return error_msg
 
 @mcp.tool()
@@ -574,23 +676,27 @@ async def launch_app_tool(bundle_id: str) -> str:
         return error_msg
     
     try:
-        if ios_driver.driver:
-            logger.info(f"Driver exists, attempting to terminate and reactivate app: {bundle_id}")
-            try:
-                ios_driver.driver.terminate_app(bundle_id)
-                ios_driver.driver.activate_app(bundle_id)
-                
-                success_msg = f"Successfully relaunched app with bundle ID: {bundle_id}"
-                logger.info(success_msg)
-                return success_msg
-            except Exception as e:
-                logger.warning(f"Failed to relaunch app via existing driver: {str(e)}")
-                logger.debug(f"Stack trace: {traceback.format_exc()}")
-                logger.info("Will try to re-initialize driver")
-                ios_driver.cleanup()
-        
-        logger.info(f"Initializing driver for app: {bundle_id}")
-        result = ios_driver.init_driver(bundle_id)
+        # Hold the connection lock so this cannot race a lazy connect or another launch
+        # into creating a second session on the shared driver
+        async with _init_lock:
+            if ios_driver.driver:
+                logger.info(f"Driver exists, attempting to terminate and reactivate app: {bundle_id}")
+                try:
+                    ios_driver.driver.terminate_app(bundle_id)
+                    ios_driver.driver.activate_app(bundle_id)
+                    
+                    success_msg = f"Successfully relaunched app with bundle ID: {bundle_id}"
+                    logger.info(success_msg)
+                    return success_msg
+                except Exception as e:
+                    logger.warning(f"Failed to relaunch app via existing driver: {str(e)}")
+                    logger.debug("Stack trace:", exc_info=True)
+                    logger.info("Will try to re-initialize driver")
+                    ios_driver.cleanup()
+            
+            logger.info(f"Initializing driver for app: {bundle_id}")
+            # Device detection and session creation block for seconds; keep them off the event loop
+            result = await asyncio.to_thread(ios_driver.init_driver, bundle_id)
         
         if result:
             success_msg = f"Successfully launched app with bundle ID: {bundle_id}"
@@ -603,14 +709,14 @@ async def launch_app_tool(bundle_id: str) -> str:
     except Exception as e:
         error_msg = f"Failed to launch app: {str(e)}"
         logger.error(error_msg)
-        logger.debug(f"Stack trace: {traceback.format_exc()}")
+        logger.debug("Stack trace:", exc_info=True)
         return error_msg
 
 @mcp.tool()
 async def take_screenshot_tool() -> str:
     """Take a screenshot and save page source of the current app state."""
     logger.info("Tool called: take_screenshot")
-    driver_status, message = check_driver_connection()
+    driver_status, message = await check_driver_connection()
     if not driver_status:
         return message
     
@@ -632,7 +738,7 @@ async def take_screenshot_tool() -> str:
         screenshots_dir.mkdir(parents=True, exist_ok=True)
         pagesource_dir.mkdir(parents=True, exist_ok=True)
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = artifact_timestamp()
         screenshot_path = screenshots_dir / f"screenshot_{timestamp}.png"
         pagesource_path = pagesource_dir / f"pagesource_{timestamp}.xml"
         
@@ -655,7 +761,7 @@ async def take_screenshot_tool() -> str:
     except Exception as e:
         error_msg = f"Failed to capture artifacts: {str(e)}"
         logger.error(error_msg)
-        logger.debug(f"Stack trace: {traceback.format_exc()}")
+        logger.debug("Stack trace:", exc_info=True)
         return error_msg
 
 if __name__ == "__main__":
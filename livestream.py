@@ -9,7 +9,6 @@
 #   "rich>=13.0.0",
 #   "libimobiledevice",
 #   "lxml>=4.9.0",
-#   "dictdiffer>=0.9.0",
 #   "tiktoken>=0.5.0",
 # ]
 # ///
@@ -18,8 +17,9 @@ import asyncio
 import logging
 import argparse
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional, Any, Union, AsyncGenerator
+from typing import Dict, Optional, Any, Union, AsyncGenerator, Iterator
 from appium.webdriver.webdriver import WebDriver
 from rich.console import Console
 from rich.live import Live
@@ -30,7 +30,6 @@ from rich.text import Text
 from rich.syntax import Syntax
 from rich.table import Table
 from lxml import etree
-from dictdiffer import diff
 import tiktoken
 from server import device_manager, Config, SwipeDirection
 import pytest_asyncio
@@ -39,6 +38,42 @@ import pytest_asyncio
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Interactive elements we care about
+_INTERACTIVE_TYPES = frozenset({
+    'XCUIElementTypeButton',
+    'XCUIElementTypeTextField',
+    'XCUIElementTypeSecureTextField',
+    'XCUIElementTypeCell',  # For table/collection view cells
+    'XCUIElementTypeLink',
+    'XCUIElementTypeSearchField',
+    'XCUIElementTypeSwitch',
+    'XCUIElementTypeSlider',
+    'XCUIElementTypePickerWheel',
+})
+
+# Text content elements we care about
+_TEXT_TYPES = frozenset({
+    'XCUIElementTypeStaticText',
+    'XCUIElementTypeTextView',
+    'XCUIElementTypeTextField',
+})
+
+# Interactive elements that Appium can tap or type into directly
+_APPIUM_INTERACTIVE_TYPES = frozenset({
+    'XCUIElementTypeButton',
+    'XCUIElementTypeTextField',
+    'XCUIElementTypeSecureTextField',
+    'XCUIElementTypeCell',
+    'XCUIElementTypeLink',
+    'XCUIElementTypeSearchField',
+    'XCUIElementTypeSwitch',
+})
+
+@lru_cache(maxsize=None)
+def _get_encoder(name: str) -> tiktoken.Encoding:
+    """Load a tiktoken encoding once per process; building the vocab tables is slow."""
+    return tiktoken.get_encoding(name)
+
 class PageSourceMonitor:
     def __init__(self, interval: float = 1.0, output_dir: Optional[Path] = None, max_depth: int = 5):
         self.interval: float = interval
@@ -51,30 +86,59 @@ class PageSourceMonitor:
         self.max_depth: int = max_depth
         self.last_error: Optional[str] = None
         
-        # Initialize tokenizer for GPT-4o (latest model)
-        self.tokenizers: Dict[str, Optional[Any]] = {
-            'gpt-4o': None  # Will be initialized on first use with correct encoding
-        }
+        # Results for the last parsed source, reused while the screen is unchanged
+        self._parsed_source: Optional[str] = None
+        self._parsed_tree: Optional[Tree] = None
+        self._parsed_dict: Optional[Dict[str, Any]] = None
+        
+        # Token counting runs in a worker thread; the last finished count is shown meanwhile.
+        # _token_source is the source of the count running or last finished
+        self._token_source: Optional[str] = None
+        self._token_task: Optional[asyncio.Task] = None
+        self._token_count: int = 0
+        
+        # One pull parser is reused for every frame instead of building a new one per parse
+        self._parser = etree.XMLPullParser(
+            events=('start', 'end'),
+            recover=True,
+            encoding='utf-8',
+            huge_tree=True,
+            remove_blank_text=True,
+            remove_comments=True,
+        )
+        
+        # Changed page sources waiting to be written to disk by the background writer
+        self._write_queue: asyncio.Queue = asyncio.Queue()
         
         # Create output directory if it doesn't exist
         self.output_dir.mkdir(exist_ok=True)
     
     def _setup_layout(self) -> None:
-        """Setup the rich layout for display."""
+        """Setup the rich layout for display; later frames only update its sections."""
         self.layout.split(
             Layout(name="header", size=3),
             Layout(name="main"),
             Layout(name="footer", size=3)
         )
+        self.layout["main"].split_column(
+            Layout(name="stats", size=6),
+            Layout(name="diff", size=10, visible=False),
+            Layout(name="tree")
+        )
+        self._stats_layout: Layout = self.layout["stats"]
+        self._diff_layout: Layout = self.layout["diff"]
+        self._tree_layout: Layout = self.layout["tree"]
     
-    def _element_to_dict(self, element: etree.Element) -> Optional[Dict[str, Any]]:
-        """Convert XML element to dictionary focusing on interactive elements and text content."""
-        # Get important attributes
-        attrs = dict(element.attrib)
+    def _node_dict(self, attrs: Any) -> Optional[Dict[str, Any]]:
+        """Convert a single element's attributes to a dictionary, or None if it is not meaningful."""
         element_type = attrs.get('type', '')
         
+        # Most nodes are layout containers, so reject them on type alone
+        if element_type not in _INTERACTIVE_TYPES and element_type not in _TEXT_TYPES:
+            return None
+        
         # Only process elements we care about
-        if not self._is_meaningful_element({'type': element_type, **attrs}):
+        if not self._is_meaningful_element(attrs):
             return None
         
         # Create a more meaningful representation
@@ -99,54 +163,22 @@ class PageSourceMonitor:
                     'height': int(attrs['height'])
                 }
         
-        # Process children
-        children = []
-        for child in element:
-            child_dict = self._element_to_dict(child)
-            if child_dict:  # Only include meaningful children
-                children.append(child_dict)
-        
-        if children:
-            result['children'] = children
-        
         return result
     
-    def _is_meaningful_element(self, element_dict: Dict[str, str]) -> bool:
+    def _is_meaningful_element(self, attrs: Any) -> bool:
         """Determine if an element is meaningful for interaction or contains important text."""
-        element_type = element_dict.get('type', '')
-        
-        # Interactive elements we care about
-        INTERACTIVE_TYPES = {
-            'XCUIElementTypeButton',
-            'XCUIElementTypeTextField',
-            'XCUIElementTypeSecureTextField',
-            'XCUIElementTypeCell',  # For table/collection view cells
-            'XCUIElementTypeLink',
-            'XCUIElementTypeSearchField',
-            'XCUIElementTypeSwitch',
-            'XCUIElementTypeSlider',
-            'XCUIElementTypePickerWheel',
-        }
-        
-        # Text content elements we care about
-        TEXT_TYPES = {
-            'XCUIElementTypeStaticText',
-            'XCUIElementTypeTextView',
-            'XCUIElementTypeTextField',
-        }
+        element_type = attrs.get('type', '')
         
         # Always include interactive elements that are enabled and accessible
-        if (element_type in INTERACTIVE_TYPES and 
-            element_dict.get('enabled') == 'true' and 
-            element_dict.get('accessible') == 'true'):
+        if (element_type in _INTERACTIVE_TYPES and 
+            attrs.get('enabled') == 'true' and 
+            attrs.get('accessible') == 'true'):
             return True
         
         # Include text elements that have actual content
-        if element_type in TEXT_TYPES and any([
-            element_dict.get('value'),
-            element_dict.get('label'),
-            element_dict.get('name')
-        ]):
+        if element_type in _TEXT_TYPES and (
+            attrs.get('value') or attrs.get('label') or attrs.get('name')
+        ):
             return True
         
         return False
@@ -154,15 +186,7 @@ class PageSourceMonitor:
     def _is_interactive_element(self, element_dict: Dict[str, Any]) -> bool:
         """Determine if an element is interactive and can be manipulated by Appium."""
         return (
-            element_dict['type'] in {
-                'XCUIElementTypeButton',
-                'XCUIElementTypeTextField',
-                'XCUIElementTypeSecureTextField',
-                'XCUIElementTypeCell',
-                'XCUIElementTypeLink',
-                'XCUIElementTypeSearchField',
-                'XCUIElementTypeSwitch',
-            } and
+            element_dict['type'] in _APPIUM_INTERACTIVE_TYPES and
             element_dict['enabled'] and
             element_dict['accessible']
         )
@@ -179,126 +203,115 @@ class PageSourceMonitor:
         table.add_column("Change Type", style="yellow", width=15)
         table.add_column("Details", style="green")
         
-        def _extract_changes(path, old, new, parent_type=""):
-            if isinstance(old, dict) and isinstance(new, dict):
-                # Only process interactive elements or text content
-                if not (self._is_interactive_element(old) or self._is_interactive_element(new)):
-                    return
-                
-                element_type = new.get('type', old.get('type', parent_type))
-                appium_id = new.get('appium_id', old.get('appium_id', ''))
-                
-                # Compare important attributes
-                for key in ['value', 'label', 'enabled', 'visible']:
-                    if key in old and key in new and old[key] != new[key]:
-                        table.add_row(
-                            f"{element_type}\n[dim]({appium_id})[/]",
-                            key.title(),
-                            f"[red]{old[key]}[/] → [green]{new[key]}[/]"
-                        )
-                
-                # Compare children
-                if 'children' in old and 'children' in new:
-                    _compare_children(path + '.children', old['children'], new['children'], element_type)
-            
-        def _compare_children(path, old_children, new_children, parent_type):
-            old_map = {self._get_element_id(c): c for c in old_children if c}
-            new_map = {self._get_element_id(c): c for c in new_children if c}
+        if old_dict and new_dict:
+            self._extract_changes(table, old_dict, new_dict)
+        
+        return table
+    
+    def _extract_changes(self, table: Table, old: Dict[str, Any], new: Dict[str, Any], parent_type: str = "") -> None:
+        """Add rows for attribute changes between two versions of an element and recurse into its children."""
+        if isinstance(old, dict) and isinstance(new, dict):
+            # Only process interactive elements or text content
+            if not (self._is_interactive_element(old) or self._is_interactive_element(new)):
+                return
             
-            # Find added and removed elements
-            added = set(new_map.keys()) - set(old_map.keys())
-            removed = set(old_map.keys()) - set(new_map.keys())
-            common = set(old_map.keys()) & set(new_map.keys())
+            element_type = new.get('type', old.get('type', parent_type))
+            appium_id = new.get('appium_id', old.get('appium_id', ''))
             
-            for key in added:
-                element = new_map[key]
-                if self._is_interactive_element(element):
+            # Compare important attributes
+            for key in ['value', 'label', 'enabled', 'visible']:
+                if key in old and key in new and old[key] != new[key]:
                     table.add_row(
-                        f"{element['type']}\n[dim]({element.get('appium_id', '')})[/]",
-                        "Added",
-                        f"label: {element.get('label', '')}, value: {element.get('value', '')}"
+                        f"{element_type}\n[dim]({appium_id})[/]",
+                        key.title(),
+                        f"[red]{old[key]}[/] → [green]{new[key]}[/]"
                     )
             
-            for key in removed:
-                element = old_map[key]
-                if self._is_interactive_element(element):
-                    table.add_row(
-                        f"{element['type']}\n[dim]({element.get('appium_id', '')})[/]",
-                        "Removed",
-                        f"label: {element.get('label', '')}, value: {element.get('value', '')}"
-                    )
-            
-            # Compare common elements
-            for key in common:
-                _extract_changes(
-                    f"{path}.{key}",
-                    old_map[key],
-                    new_map[key],
-                    old_map[key].get('type', parent_type)
+            # Compare children
+            if 'children' in old and 'children' in new:
+                self._compare_children(table, old['children'], new['children'], element_type)
+    
+    def _compare_children(self, table: Table, old_children: list, new_children: list, parent_type: str) -> None:
+        """Add rows for added and removed children, matched by element id, and compare the rest."""
+        old_map = {self._get_element_id(c): c for c in old_children if c}
+        new_map = {self._get_element_id(c): c for c in new_children if c}
+        
+        # Find added and removed elements
+        added = new_map.keys() - old_map.keys()
+        removed = old_map.keys() - new_map.keys()
+        common = old_map.keys() & new_map.keys()
+        
+        for key in added:
+            element = new_map[key]
+            if self._is_interactive_element(element):
+                table.add_row(
+                    f"{element['type']}\n[dim]({element.get('appium_id', '')})[/]",
+                    "Added",
+                    f"label: {element.get('label', '')}, value: {element.get('value', '')}"
                 )
         
-        if old_dict and new_dict:
-            _extract_changes("root", old_dict, new_dict)
+        for key in removed:
+            element = old_map[key]
+            if self._is_interactive_element(element):
+                table.add_row(
+                    f"{element['type']}\n[dim]({element.get('appium_id', '')})[/]",
+                    "Removed",
+                    f"label: {element.get('label', '')}, value: {element.get('value', '')}"
+                )
         
-        return table
+        # Compare common elements
+        for key in common:
+            self._extract_changes(
+                table,
+                old_map[key],
+                new_map[key],
+                old_map[key].get('type', parent_type)
+            )
     
-    def _get_element_id(self, element: Optional[Dict[str, Any]]) -> str:
-        """Generate a unique identifier for an element."""
+    def _get_element_id(self, element: Optional[Dict[str, Any]]) -> tuple:
+        """
+        Generate a unique identifier for an element. A tuple of the identifying fields
+        hashes in C and compares exactly, without formatting a string per element.
+        """
         if not element:
-            return ""
+            return ()
         
-        parts: list[str] = []
-        if element.get('type'):
-            parts.append(element['type'])
-        if element.get('appium_id'):
-            parts.append(f"id={element['appium_id']}")
-        elif element.get('name'):
-            parts.append(f"name={element['name']}")
-        if element.get('geometry'):
-            geo = element['geometry']
-            parts.append(f"pos={geo['x']},{geo['y']}")
-        return '|'.join(parts)
+        appium_id = element.get('appium_id') or None
+        geometry = element.get('geometry')
+        return (
+            element.get('type') or None,
+            appium_id,
+            None if appium_id else element.get('name') or None,
+            (geometry['x'], geometry['y']) if geometry else None,
+        )
     
-    def _clean_xml(self, source: str) -> str:
-        """Clean XML source before parsing."""
+    def _clean_xml(self, source: str) -> bytes:
+        """Clean XML source and encode it as UTF-8 bytes for the parser."""
+        # Lone surrogates cannot be encoded as UTF-8 and are dropped here
+        source_bytes = source.encode('utf-8', errors='ignore')
+        
         # Add XML declaration if missing
-        if not source.strip().startswith('<?xml'):
-            source = '<?xml version="1.0" encoding="UTF-8"?>\n' + source
+        if not source_bytes.lstrip().startswith(b'<?xml'):
+            source_bytes = b'<?xml version="1.0" encoding="UTF-8"?>\n' + source_bytes
         
         # Remove any null bytes
-        source = source.replace('\x00', '')
-        
-        # Remove any invalid XML characters
-        source = ''.join(char for char in source if ord(char) < 0xD800 or ord(char) > 0xDFFF)
-        
-        return source
+        return source_bytes.translate(None, b'\x00')
     
     def _parse_xml(self, source: str) -> tuple[Union[Tree, None], Optional[Dict[str, Any]]]:
         """Parse XML and create a rich Tree representation and dictionary."""
         try:
-            # Clean the XML first
-            cleaned_source = self._clean_xml(source)
+            # Clean the XML and encode it in one step
+            source_bytes = self._clean_xml(source)
             
-            # Convert to bytes with explicit encoding
-            source_bytes = cleaned_source.encode('utf-8')
-            
-            # Try to parse
-            parser = etree.XMLParser(recover=True, encoding='utf-8')
-            root = etree.fromstring(source_bytes, parser=parser)
-            
-            # Convert to dictionary for diffing
-            tree_dict = self._element_to_dict(root)
+            # Stream the document, building the dictionary and the tree in one pass
+            tree, tree_dict = self._build_from_events(self._iter_events(source_bytes))
             
             # Check for parser errors
-            if len(parser.error_log) > 0:
-                errors = [str(error) for error in parser.error_log]
+            error_log = self._parser.feed_error_log
+            if len(error_log) > 0:
+                errors = [str(error) for error in error_log]
                 logger.warning(f"XML parsing warnings: {errors}")
             
-            tree = Tree(
-                Text(f"[bold blue]{root.tag}[/]", style="bold blue"),
-                guide_style="bold bright_black",
-            )
-            self._build_tree(root, tree, depth=0)
             self.last_error = None
             return tree, tree_dict
         except Exception as e:
@@ -326,54 +339,116 @@ class PageSourceMonitor:
             error_tree.add(Syntax(source[:500] + "...", "xml", theme="monokai"))
             return error_tree, None
     
-    def _build_tree(self, element: etree.Element, tree: Tree, depth: int = 0) -> None:
-        """Recursively build the tree representation."""
-        if depth >= self.max_depth:
-            if len(element) > 0:
-                tree.add("[dim]...[/]")
-            return
+    def _iter_events(self, source_bytes: bytes, chunk_size: int = 64 * 1024) -> Iterator[tuple[str, Any]]:
+        """
+        Feed the document to the shared parser in chunks and yield its start/end events.
+        The parser is always closed and its event queue drained, so a frame that fails
+        midway cannot leak events into the next one.
+        """
+        parser = self._parser
+        closed = False
+        try:
+            for offset in range(0, len(source_bytes), chunk_size):
+                parser.feed(source_bytes[offset:offset + chunk_size])
+                yield from parser.read_events()
+            closed = True
+            parser.close()
+            yield from parser.read_events()
+        finally:
+            if not closed:
+                try:
+                    parser.close()
+                except etree.XMLSyntaxError:
+                    pass
+            for _ in parser.read_events():
+                pass
+    
+    def _build_from_events(self, events: Any) -> tuple[Tree, Optional[Dict[str, Any]]]:
+        """
+        Build the rich tree and the dictionary from iterparse start/end events.
+        Subtrees of elements that are not meaningful are left out of the dictionary,
+        and the tree stops at max_depth with a "..." marker.
+        """
+        tree: Optional[Tree] = None
+        tree_dict: Optional[Dict[str, Any]] = None
+        # One entry per open element: [tree node, dict node, meaningful children, truncated]
+        stack: list[list[Any]] = []
         
-        for child in element:
-            try:
-                # Get important attributes
-                name = child.get('name', '')
-                type_ = child.get('type', '')
-                label = child.get('label', '')
-                value = child.get('value', '')
+        for event, element in events:
+            if event == 'start':
+                attrs = element.attrib
+                depth = len(stack)
+                if not stack:
+                    tree = Tree(
+                        Text(f"[bold blue]{element.tag}[/]", style="bold blue"),
+                        guide_style="bold bright_black",
+                    )
+                    tree_dict = node_dict = self._node_dict(attrs)
+                    stack.append([tree, node_dict, [], False])
+                    continue
                 
-                # Create node label
-                node_parts = []
-                if type_:
-                    node_parts.append(f"[bold cyan]{type_}[/]")
-                if name:
-                    node_parts.append(f"[yellow]name=[green]\"{name}\"[/]")
-                if label and label != name:
-                    node_parts.append(f"[yellow]label=[green]\"{label}\"[/]")
-                if value and value != name and value != label:
-                    node_parts.append(f"[yellow]value=[green]\"{value}\"[/]")
+                parent = stack[-1]
+                node = None
+                if parent[0] is not None:
+                    if depth <= self.max_depth:
+                        try:
+                            node = parent[0].add(self._node_label(attrs))
+                        except Exception as e:
+                            logger.error(f"Error processing element: {e}")
+                            parent[0].add(f"[red]Error processing element: {str(e)}[/]")
+                    elif not parent[3]:
+                        parent[0].add("[dim]...[/]")
+                        parent[3] = True
                 
-                node_label = " ".join(node_parts) if node_parts else "[dim]<empty>[/]"
+                node_dict = self._node_dict(attrs) if parent[1] is not None else None
+                if node_dict is not None:
+                    parent[2].append(node_dict)
+                stack.append([node, node_dict, [], False])
+            else:
+                _, node_dict, children, _ = stack.pop()
+                if node_dict is not None and children:
+                    node_dict['children'] = children
                 
-                # Add node to tree
-                child_tree = tree.add(node_label)
-                self._build_tree(child, child_tree, depth + 1)
-            except Exception as e:
-                logger.error(f"Error processing element: {e}")
-                tree.add(f"[red]Error processing element: {str(e)}[/]")
+                # Drop the parsed element and its finished siblings to keep memory flat
+                element.clear()
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+        
+        if tree is None:
+            raise ValueError("Document has no root element")
+        return tree, tree_dict
+    
+    def _node_label(self, attrs: Any) -> str:
+        """Create the tree label for an element."""
+        # Get important attributes
+        name = attrs.get('name', '')
+        type_ = attrs.get('type', '')
+        label = attrs.get('label', '')
+        value = attrs.get('value', '')
+        
+        # Create node label
+        node_parts = []
+        if type_:
+            node_parts.append(f"[bold cyan]{type_}[/]")
+        if name:
+            node_parts.append(f"[yellow]name=[green]\"{name}\"[/]")
+        if label and label != name:
+            node_parts.append(f"[yellow]label=[green]\"{label}\"[/]")
+        if value and value != name and value != label:
+            node_parts.append(f"[yellow]value=[green]\"{value}\"[/]")
+        
+        return " ".join(node_parts) if node_parts else "[dim]<empty>[/]"
     
     def _save_page_source(self, source: str) -> bool:
-        """Save page source to a file if it has changed."""
+        """Queue page source to be saved to a file if it has changed."""
         try:
             if source != self.last_source:
-                # Ensure output directory exists
-                self.output_dir.mkdir(parents=True, exist_ok=True)
-                
                 # Create timestamp and filename
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = self.output_dir / f"page_source_{timestamp}.xml"
                 
-                # Write file with proper encoding
-                filename.write_text(source, encoding='utf-8')
+                # The background writer does the disk I/O
+                self._write_queue.put_nowait((filename, source))
                 
                 self.changes_count += 1
                 self.last_source = source
@@ -383,19 +458,61 @@ class PageSourceMonitor:
             logger.error(f"Error saving page source: {e}")
             return False
     
+    async def _drain_writes(self, batch_size: int = 16) -> None:
+        """Write queued page sources to disk in worker threads, a batch per wakeup."""
+        while True:
+            batch = [await self._write_queue.get()]
+            while len(batch) < batch_size and not self._write_queue.empty():
+                batch.append(self._write_queue.get_nowait())
+            try:
+                await asyncio.to_thread(self._write_files, batch)
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
+    
+    def _write_files(self, batch: list[tuple[Path, str]]) -> None:
+        """Write a batch of page sources, logging rather than raising errors."""
+        for filename, source in batch:
+            try:
+                # Ensure output directory exists
+                filename.parent.mkdir(parents=True, exist_ok=True)
+                
+                # Write file with proper encoding
+                filename.write_text(source, encoding='utf-8')
+            except Exception as e:
+                logger.error(f"Error saving page source: {e}")
+    
     def _count_tokens(self, text: str) -> int:
         """Count tokens for GPT-4o (latest model)."""
         try:
-            # Initialize tokenizer if not already done
-            if not self.tokenizers['gpt-4o']:
-                self.tokenizers['gpt-4o'] = tiktoken.get_encoding("cl100k_base")
-            
-            # Count tokens
-            return len(self.tokenizers['gpt-4o'].encode(text))
+            # o200k_base is the encoding GPT-4o uses
+            return len(_get_encoder("o200k_base").encode_ordinary(text))
         except Exception as e:
             logger.error(f"Error counting tokens: {e}")
             return 0
     
+    async def _fetch_page_source(self) -> str:
+        """Fetch the page source in a worker thread, off the event loop."""
+        return await asyncio.to_thread(getattr, device_manager.driver, 'page_source')
+    
+    def _refresh_token_count(self, source: str) -> int:
+        """
+        Count tokens for the latest source in a worker thread and return the most
+        recent finished count, so the display never waits on the tokenizer. Only one
+        count runs at a time; when it finishes, the next one starts for whatever
+        source is newest by then.
+        """
+        task = self._token_task
+        if task is not None and task.done():
+            self._token_count = task.result()
+            self._token_task = None
+        
+        if self._token_task is None and source != self._token_source:
+            self._token_source = source
+            self._token_task = asyncio.create_task(asyncio.to_thread(self._count_tokens, source))
+        
+        return self._token_count
+    
     def _create_token_info(self, token_count: int) -> Text:
         """Create token count and cost info for GPT-4o ($15 per 1M tokens)."""
         cost = (token_count / 1_000_000) * 15.0
@@ -410,6 +527,8 @@ class PageSourceMonitor:
     async def monitor(self) -> None:
         """Start monitoring page source."""
         self._setup_layout()
+        loop = asyncio.get_running_loop()
+        writer = asyncio.create_task(self._drain_writes())
         
         try:
             # Initialize device session if not already initialized
@@ -418,21 +537,23 @@ class PageSourceMonitor:
             
             with Live(self.layout, refresh_per_second=4) as live:
                 while True:
+                    tick_start = loop.time()
                     try:
                         # Get current time
                         current_time = datetime.now().strftime("%H:%M:%S")
                         
-                        # Get page source
-                        source = device_manager.driver.page_source
+                        # Get page source off the event loop so the display keeps refreshing
+                        source = await self._fetch_page_source()
                         changed = self._save_page_source(source)
                         
-                        # Count tokens
-                        token_count = self._count_tokens(source)
+                        # Parse only when the source differs from the last parse
+                        if source != self._parsed_source:
+                            self._parsed_tree, self._parsed_dict = self._parse_xml(source)
+                            self._parsed_source = source
+                        token_count = self._refresh_token_count(source)
+                        tree, tree_dict = self._parsed_tree, self._parsed_dict
                         token_info = self._create_token_info(token_count)
                         
-                        # Parse and create tree view
-                        tree, tree_dict = self._parse_xml(source)
-                        
                         # Create diff table if we have previous state
                         diff_table = None
                         if changed and self.last_tree_dict and tree_dict:
@@ -455,23 +576,11 @@ class PageSourceMonitor:
                             title="Statistics"
                         )
                         
-                        main_layout = Layout()
-                        if diff_table and changed:
-                            diff_panel = Panel(diff_table, title="Changes")
-                            tree_panel = Panel(tree, title="UI Element Tree")
-                            main_layout.split_column(
-                                Layout(stats_panel, size=6),
-                                Layout(diff_panel, size=10),
-                                Layout(tree_panel)
-                            )
-                        else:
-                            tree_panel = Panel(tree, title="UI Element Tree")
-                            main_layout.split_column(
-                                Layout(stats_panel, size=6),
-                                Layout(tree_panel)
-                            )
-                        
-                        self.layout["main"].update(main_layout)
+                        self._stats_layout.update(stats_panel)
+                        self._diff_layout.visible = bool(diff_table and changed)
+                        if self._diff_layout.visible:
+                            self._diff_layout.update(Panel(diff_table, title="Changes"))
+                        self._tree_layout.update(Panel(tree, title="UI Element Tree"))
                         
                         # Update footer with token info aligned right
                         footer_text = Text.assemble(
@@ -481,18 +590,23 @@ class PageSourceMonitor:
                         )
                         self.layout["footer"].update(Panel(footer_text))
                         
-                        await asyncio.sleep(self.interval)
+                        # Time spent fetching and rendering counts toward the interval
+                        await asyncio.sleep(max(0.0, self.interval - (loop.time() - tick_start)))
                         
                     except Exception as e:
                         logger.error(f"Error during monitoring: {e}")
-                        self.layout["main"].update(
+                        self._diff_layout.visible = False
+                        self._tree_layout.update(
                             Panel(f"[red]Error: {str(e)}[/]")
                         )
-                        await asyncio.sleep(self.interval)
+                        await asyncio.sleep(max(0.0, self.interval - (loop.time() - tick_start)))
                         
         except KeyboardInterrupt:
             logger.info("Monitoring stopped by user")
         finally:
+            # Let queued page sources reach disk before stopping the writer
+            await self._write_queue.join()
+            writer.cancel()
             await device_manager.cleanup()
 
 async def main() -> None:
@@ -3,7 +3,6 @@
 from typing import Optional, List, Dict, Any
 import asyncio
 import logging
-import traceback
 from ..appium.tools import (
     get_page_source, tap_element, take_screenshot,
     swipe, SwipeDirection
@@ -58,7 +57,7 @@ class ScreenshotAgent:
         except Exception as e:
             error_msg = f"Failed to start session: {str(e)}"
             logger.error(error_msg)
-            logger.debug(f"Stack trace: {traceback.format_exc()}")
+            logger.debug("Stack trace:", exc_info=True)
             print_error(error_msg)
             # Re-raise to allow caller to handle
             raise
@@ -74,7 +73,7 @@ class ScreenshotAgent:
         except Exception as e:
             error_msg = f"Error ending session: {str(e)}"
             logger.error(error_msg)
-            logger.debug(f"Stack trace: {traceback.format_exc()}")
+            logger.debug("Stack trace:", exc_info=True)
             print_error(error_msg)
 
     async def capture_screen(self) -> Dict[str, Any]:
@@ -110,7 +109,7 @@ class ScreenshotAgent:
         except Exception as e:
             error_msg = f"Error capturing screen: {str(e)}"
             logger.error(error_msg)
-            logger.debug(f"Stack trace: {traceback.format_exc()}")
+            logger.debug("Stack trace:", exc_info=True)
             print_error(error_msg)
             # Return minimal result to avoid further errors
             return {
@@ -3,63 +3,143 @@
 import atexit
 from appium import webdriver
 from appium.webdriver.common.appiumby import AppiumBy
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
 import logging
 import weakref
-import traceback
 import sys
+import threading
+import shutil
 import subprocess
 import json
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, FrozenSet, Tuple
 
 # Add the parent directory to sys.path to allow importing from src
 sys.path.append(str(Path(__file__).parent.parent.parent))
-from src.config import load_config
+from src.config import Config, load_config
 
 logger = logging.getLogger(__name__)
 
+# ideviceinfo keys read during device detection
+DEVICE_INFO_KEYS = frozenset({'UniqueDeviceID', 'DeviceName', 'ProductVersion', 'ProductType'})
+
+@lru_cache(maxsize=None)
+def resolve_command(command: str) -> Optional[str]:
+    """Resolve a command to its absolute path on PATH, or None if missing. Results are cached for the process lifetime."""
+    return shutil.which(command)
+
 class IOSDriver:
-    _instances = set()
+    _instances = weakref.WeakSet()
     
     def __init__(self):
         self.driver = None
-        self.config = load_config()
+        # Loaded on first use so importing this module stays free of dotenv and filesystem work
+        self._config: Optional[Config] = None
         self.device_info = None
+        # Screen size of the current session, fetched on first use
+        self._window_size: Optional[Dict[str, int]] = None
+        # Last detection result, keyed by the set of connected UDIDs
+        self._device_cache: Optional[Tuple[FrozenSet[str], Optional[Dict[str, str]]]] = None
+        # Config-derived capabilities, keyed by whether they target a real device
+        self._capabilities_cache: Dict[bool, Dict[str, Any]] = {}
         # Add self to the set of instances
-        self._instances.add(weakref.ref(self))
+        self._instances.add(self)
         logger.debug("IOSDriver instance created")
     
+    @property
+    def config(self) -> Config:
+        """Configuration, loaded the first time a driver is initialized."""
+        if self._config is None:
+            self._config = load_config()
+        return self._config
+    
     @classmethod
     def _cleanup_all(cls):
-        """Clean up all driver instances."""
+        """Clean up all driver instances, quitting their sessions in parallel."""
         logger.info("Cleaning up all driver instances")
-        for instance_ref in cls._instances:
-            instance = instance_ref()
-            if instance is not None:
-                try:
-                    instance.cleanup()
-                except Exception as e:
-                    logger.error(f"Error cleaning up instance: {str(e)}")
+        # This runs from atexit, where ThreadPoolExecutor no longer accepts work,
+        # so fan out with plain threads
+        started = []
+        remaining = list(cls._instances)
+        try:
+            while remaining:
+                thread = threading.Thread(target=cls._cleanup_instance, args=(remaining[0],))
+                thread.start()
+                started.append(thread)
+                remaining.pop(0)
+        except RuntimeError:
+            # Python 3.12.0 and 3.12.1 refuse to start threads at interpreter shutdown,
+            # so clean up whatever is left serially
+            logger.debug("Cannot start cleanup threads at shutdown, cleaning up serially")
+            for instance in remaining:
+                cls._cleanup_instance(instance)
+        for thread in started:
+            thread.join()
+    
+    @staticmethod
+    def _cleanup_instance(instance: "IOSDriver"):
+        """Clean up a single driver instance, logging rather than raising errors."""
+        try:
+            instance.cleanup()
+        except Exception as e:
+            logger.error(f"Error cleaning up instance: {str(e)}")
+    
+    def _list_connected_udids(self) -> Optional[FrozenSet[str]]:
+        """List UDIDs of connected devices with idevice_id, or None if they cannot be listed."""
+        idevice_id = resolve_command('idevice_id')
+        if not idevice_id:
+            return None
+            
+        try:
+            result = subprocess.run([idevice_id, '-l'], capture_output=True, text=True, close_fds=False, timeout=5)
+            if result.returncode != 0:
+                return None
+            return frozenset(line.strip() for line in result.stdout.splitlines() if line.strip())
+        except Exception as e:
+            logger.debug(f"Error listing connected devices: {str(e)}")
+            return None
     
     def detect_real_device(self) -> Optional[Dict[str, str]]:
-        """Detect connected iOS device using libimobiledevice."""
+        """
+        Detect connected iOS device, reusing the previous result while the set of
+        connected UDIDs is unchanged. idevice_id only talks to usbmuxd, which is much
+        cheaper than the lockdown session ideviceinfo opens.
+        """
+        udids = self._list_connected_udids()
+        if udids is not None and self._device_cache is not None and self._device_cache[0] == udids:
+            logger.debug("Connected devices unchanged, reusing cached device info")
+            return self._device_cache[1]
+        
+        device_info = self._query_real_device()
+        # A connected device that could not be queried (pairing prompt, lockdownd
+        # error, timeout) must be asked again next time rather than cached as absent
+        if udids is not None and (device_info is not None or not udids):
+            self._device_cache = (udids, device_info)
+        else:
+            self._device_cache = None
+        return device_info
+    
+    def _query_real_device(self) -> Optional[Dict[str, str]]:
+        """Query connected iOS device information using libimobiledevice."""
+        ideviceinfo = resolve_command('ideviceinfo')
+        if not ideviceinfo:
+            logger.debug("ideviceinfo not found, skipping real device detection")
+            return None
+            
         try:
             # Run ideviceinfo to get device information
-            result = subprocess.run(['ideviceinfo'], capture_output=True, text=True)
+            result = subprocess.run([ideviceinfo], capture_output=True, text=True, close_fds=False, timeout=10)
             if result.returncode != 0:
                 logger.debug("No iOS device detected with ideviceinfo")
                 return None
                 
-            # Parse the output to get device details
-            lines = result.stdout.strip().split('\n')
+            # Parse the output, keeping only the top-level keys we use
             device_info = {}
-            for line in lines:
-                if ': ' in line:
-                    key, value = line.split(': ', 1)
-                    device_info[key.strip()] = value.strip()
+            for line in result.stdout.splitlines():
+                key, sep, value = line.partition(': ')
+                if sep and key in DEVICE_INFO_KEYS:
+                    device_info[key] = value.strip()
             
             # Extract relevant information
             if 'UniqueDeviceID' in device_info:
@@ -81,23 +161,33 @@ class IOSDriver:
             logger.error("Cannot initialize driver: Empty bundle ID")
             return False
             
+        # Try to detect real device first
+        device_info = self.detect_real_device()
+        
         if self.driver:
+            # Creating a session reinstalls and relaunches WebDriverAgent on real devices,
+            # so keep the current one when it already targets this device and app. Restart
+            # the app so it opens fresh, as a new session would
+            if self._session_matches(device_info, bundle_id):
+                try:
+                    self.driver.terminate_app(bundle_id)
+                    self.driver.activate_app(bundle_id)
+                    logger.info(f"Reusing existing session for bundle ID: {bundle_id}")
+                    return True
+                except Exception as e:
+                    logger.warning(f"Could not reuse existing session: {str(e)}")
+            
             logger.info("Driver already exists, cleaning up before re-initialization")
             self.cleanup()
             
         logger.info(f"Initializing iOS driver for bundle ID: {bundle_id}")
         appium_config = self.config.appium
+        self.device_info = device_info
         
-        # Try to detect real device first
-        self.device_info = self.detect_real_device()
-        
-        # Create Appium options object for newer Appium versions
+        # Create Appium options object for newer Appium versions, starting from the
+        # capabilities that only depend on config
         from appium.options.ios import XCUITestOptions
-        options = XCUITestOptions()
-        
-        # Set required capabilities
-        options.platform_name = appium_config.platform_name
-        options.automation_name = appium_config.automation_name
+        options = XCUITestOptions().load_capabilities(self._base_capabilities(self.device_info is not None))
         
         # Use detected device info if available, otherwise fall back to config
         if self.device_info:
@@ -105,7 +195,51 @@ class IOSDriver:
             options.device_name = self.device_info['name']
             options.platform_version = self.device_info['ios_version']
             options.udid = self.device_info['udid']
+        else:
+            logger.info("No real device detected, using simulator configuration")
+        
+        options.bundle_id = bundle_id
+        
+        # Construct Appium server URL
+        server_url = f'http://{appium_config.host}:{appium_config.port}'
+        
+        try:
+            logger.debug(f"Connecting to Appium server at {server_url}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Using options: {options.to_capabilities()}")
+            
+            # Create the driver with options
+            self.driver = webdriver.Remote(command_executor=server_url, options=options)
             
+            if not self.driver:
+                logger.error("Driver creation returned None")
+                return False
+                
+            logger.info("Successfully initialized iOS driver")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to initialize iOS driver: {str(e)}")
+            logger.debug("Stack trace:", exc_info=True)
+            return False
+
+    def _base_capabilities(self, real_device: bool) -> Dict[str, Any]:
+        """Build the config-derived capabilities once per device kind and reuse them."""
+        capabilities = self._capabilities_cache.get(real_device)
+        if capabilities is not None:
+            return capabilities
+            
+        from appium.options.ios import XCUITestOptions
+        appium_config = self.config.appium
+        options = XCUITestOptions()
+        
+        # Set required capabilities
+        options.platform_name = appium_config.platform_name
+        options.automation_name = appium_config.automation_name
+        
+        # Bound how deep WDA walks the accessibility tree for page source and lookups
+        options.set_capability("appium:settings[snapshotMaxDepth]", appium_config.snapshot_max_depth)
+        
+        if real_device:
             # Add WebDriverAgent configuration for real devices
             if appium_config.team_id:
                 options.set_capability("appium:xcodeOrgId", appium_config.team_id)
@@ -126,33 +260,29 @@ class IOSDriver:
             options.set_capability("appium:statusBarTime", "9:41")
             options.set_capability("appium:forceStatusBarTime", True)
         else:
-            logger.info("No real device detected, using simulator configuration")
             options.device_name = appium_config.device_name
             options.platform_version = appium_config.platform_version
         
-        options.bundle_id = bundle_id
-        
-        # Construct Appium server URL
-        server_url = f'http://{appium_config.host}:{appium_config.port}'
-        
+        capabilities = self._capabilities_cache[real_device] = dict(options.capabilities)
+        return capabilities
+
+    def _session_matches(self, device_info: Optional[Dict[str, str]], bundle_id: str) -> bool:
+        """Check if the current session targets the given device and bundle ID."""
+        current_udid = self.device_info['udid'] if self.device_info else None
+        new_udid = device_info['udid'] if device_info else None
+        if current_udid != new_udid:
+            return False
         try:
-            logger.debug(f"Connecting to Appium server at {server_url}")
-            logger.debug(f"Using options: {options.to_capabilities()}")
-            
-            # Create the driver with options
-            self.driver = webdriver.Remote(command_executor=server_url, options=options)
-            
-            if not self.driver:
-                logger.error("Driver creation returned None")
-                return False
-                
-            logger.info("Successfully initialized iOS driver")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to initialize iOS driver: {str(e)}")
-            logger.debug(f"Stack trace: {traceback.format_exc()}")
+            return self.driver.capabilities.get('bundleId') == bundle_id
+        except Exception:
             return False
 
+    def get_window_size(self) -> Dict[str, int]:
+        """Get the screen size, which is fixed for the lifetime of a session."""
+        if self._window_size is None:
+            self._window_size = self.driver.get_window_size()
+        return self._window_size
+
     def cleanup(self):
         """Clean up the driver instance."""
         logger.info("Cleaning up driver instance")
@@ -172,6 +302,7 @@ class IOSDriver:
                 logger.warning(f"Error during driver cleanup: {str(e)}")
             finally:
                 self.driver = None
+                self._window_size = None
 
     def tap_element(self, **locator):
         """Tap an element identified by the given locator."""
@@ -193,19 +324,22 @@ class IOSDriver:
                 logger.error("Invalid locator format")
                 return False, "Invalid locator format"
                 
+            by = getattr(AppiumBy, locator_type.upper(), None)
+            if by is None:
+                logger.error(f"Unsupported locator type: {locator_type}")
+                return False, f"Unsupported locator type: {locator_type}"
+                
             logger.debug(f"Using locator: {locator_type}={locator_value}")
-            element = WebDriverWait(self.driver, 5).until(
-                EC.presence_of_element_located((AppiumBy.CLASS_NAME, locator.get('class_name')))
-            )
+            element = self.driver.find_element(by=by, value=locator_value)
             element.click()
             logger.info("Successfully tapped element")
             return True, "Successfully tapped element"
-        except TimeoutException:
-            logger.warning(f"Element not found within timeout: {locator}")
-            return False, "Element not found within timeout"
+        except NoSuchElementException:
+            logger.warning(f"Element not found: {locator}")
+            return False, "Element not found"
         except Exception as e:
             logger.error(f"Failed to tap element: {str(e)}")
-            logger.debug(f"Stack trace: {traceback.format_exc()}")
+            logger.debug("Stack trace:", exc_info=True)
             return False, f"Failed to tap element: {str(e)}"
 
     def get_page_source(self):
@@ -219,7 +353,7 @@ class IOSDriver:
             return self.driver.page_source
         except Exception as e:
             logger.error(f"Failed to get page source: {str(e)}")
-            logger.debug(f"Stack trace: {traceback.format_exc()}")
+            logger.debug("Stack trace:", exc_info=True)
             return None
 
 # Register cleanup for all instances
@@ -3,11 +3,10 @@
 from agents import function_tool
 from appium.webdriver.common.appiumby import AppiumBy
 from enum import Enum
-from datetime import datetime
 from pathlib import Path
 import logging
-import traceback
 import difflib
+import re
 from typing import Optional, Dict, Any, Tuple, Callable, TypeVar, Awaitable
 from functools import wraps
 from .driver import ios_driver
@@ -35,11 +34,26 @@ def require_appium_connection(func):
         return await func(*args, **kwargs)
     return wrapper
 
+# Simple XPath shapes that have an exact iOS class chain equivalent
+_SIMPLE_XPATH = re.compile(r"""^//(XCUIElementType\w+)(?:\[@(name|label|value)=(['"])([^'"`\\]*)\3\])?$""")
+
 class LocatorStrategy(str, Enum):
     ACCESSIBILITY_ID = "accessibility_id"
     XPATH = "xpath"
     NAME = "name"
     CLASS_NAME = "class_name"
+    IOS_CLASS_CHAIN = "ios_class_chain"
+    IOS_PREDICATE = "ios_predicate"
+
+# Appium strategy for each tool locator strategy
+LOCATOR_MAP = {
+    LocatorStrategy.ACCESSIBILITY_ID: AppiumBy.ACCESSIBILITY_ID,
+    LocatorStrategy.XPATH: AppiumBy.XPATH,
+    LocatorStrategy.NAME: AppiumBy.NAME,
+    LocatorStrategy.CLASS_NAME: AppiumBy.CLASS_NAME,
+    LocatorStrategy.IOS_CLASS_CHAIN: AppiumBy.IOS_CLASS_CHAIN,
+    LocatorStrategy.IOS_PREDICATE: AppiumBy.IOS_PREDICATE
+}
 
 class PhysicalButton(str, Enum):
     HOME = "home"
@@ -53,6 +67,28 @@ class SwipeDirection(str, Enum):
     LEFT = "left"
     RIGHT = "right"
 
+# Swipe start and end points for each direction, as fractions of the screen size
+SWIPE_FRACTIONS = {
+    SwipeDirection.UP: (0.5, 0.7, 0.5, 0.3),
+    SwipeDirection.DOWN: (0.5, 0.3, 0.5, 0.7),
+    SwipeDirection.LEFT: (0.8, 0.5, 0.2, 0.5),
+    SwipeDirection.RIGHT: (0.2, 0.5, 0.8, 0.5)
+}
+
+def xpath_to_class_chain(xpath: str) -> Optional[str]:
+    """
+    Rewrite simple XPath locators such as //XCUIElementTypeButton[@name='OK'] into
+    an iOS class chain query, which WebDriverAgent resolves natively instead of
+    snapshotting the whole tree. Returns None for anything it cannot translate.
+    """
+    match = _SIMPLE_XPATH.match(xpath.strip())
+    if not match:
+        return None
+    element_type, attribute, _, value = match.groups()
+    if attribute is None:
+        return f"**/{element_type}"
+    return f'**/{element_type}[`{attribute} == "{value}"`]'
+
 def check_driver_connection() -> Tuple[bool, str]:
     """Check if driver is connected and return status."""
     if not ios_driver.driver:
@@ -62,6 +98,14 @@ def check_driver_connection() -> Tuple[bool, str]:
         return False, error_msg
     return True, "Driver connected"
 
+def artifact_timestamp() -> str:
+    """
+    Timestamp for artifact filenames, with millisecond precision so captures
+    taken within the same second get distinct names.
+    """
+    seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+    return f"{time.strftime('%Y%m%d_%H%M%S', time.localtime(seconds))}_{nanos // 1_000_000:03d}"
+
 def get_clean_page_source() -> Optional[str]:
     """
     Get the current page source without any cleaning.
@@ -86,7 +130,7 @@ def get_clean_page_source() -> Optional[str]:
         return page_source
     except Exception as e:
         logger.error(f"Error getting page source: {str(e)}")
-        logger.debug(f"Stack trace: {traceback.format_exc()}")
+        logger.debug("Stack trace:", exc_info=True)
         return None
 
 # Type variable for generic function signatures
@@ -119,7 +163,7 @@ async def get_page_source() -> str:
     except Exception as e:
         error_msg = f"Failed to get page source: {str(e)}"
         logger.error(error_msg)
-        logger.debug(f"Stack trace: {traceback.format_exc()}")
+        logger.debug("Stack trace:", exc_info=True)
         print_error(error_msg)
         return error_msg
 
@@ -146,14 +190,13 @@ async def tap_element(element_id: str, *, by: Optional[LocatorStrategy] = None)
         return message
     
     try:
-        locator_map = {
-            LocatorStrategy.ACCESSIBILITY_ID: AppiumBy.ACCESSIBILITY_ID,
-            LocatorStrategy.XPATH: AppiumBy.XPATH,
-            LocatorStrategy.NAME: AppiumBy.NAME,
-            LocatorStrategy.CLASS_NAME: AppiumBy.CLASS_NAME
-        }
-        
-        by_strategy = locator_map[by] if by else AppiumBy.ACCESSIBILITY_ID
+        by_strategy = LOCATOR_MAP[by] if by else AppiumBy.ACCESSIBILITY_ID
+        locator_value = element_id
+        if by == LocatorStrategy.XPATH:
+            # Prefer a native class chain query when the XPath has an exact equivalent
+            class_chain = xpath_to_class_chain(element_id)
+            if class_chain:
+                by_strategy, locator_value = AppiumBy.IOS_CLASS_CHAIN, class_chain
         logger.debug(f"Using locator strategy: {by_strategy} with value: {element_id}")
         
         # Update app state with current activity/view information if available
@@ -188,7 +231,7 @@ async def tap_element(element_id: str, *, by: Optional[LocatorStrategy] = None)
             logger.debug(f"Error capturing page source: {str(e)}")
         
         try:
-            element = ios_driver.driver.find_element(by=by_strategy, value=element_id)
+            element = ios_driver.driver.find_element(by=by_strategy, value=locator_value)
         except Exception as e:
             error_msg = f"Element not found: {str(e)}"
             logger.warning(error_msg)
@@ -201,7 +244,7 @@ async def tap_element(element_id: str, *, by: Optional[LocatorStrategy] = None)
                 "status": "failed",
                 "reason": "element_not_found",
                 "error": str(e),
-                "selector_used": f"{by_strategy}={element_id}"
+                "selector_used": f"{by_strategy}={locator_value}"
             })
             
             return error_msg
@@ -218,7 +261,7 @@ async def tap_element(element_id: str, *, by: Optional[LocatorStrategy] = None)
                 "by": str(by) if by else "accessibility_id",
                 "status": "failed",
                 "reason": "element_not_visible",
-                "selector_used": f"{by_strategy}={element_id}"
+                "selector_used": f"{by_strategy}={locator_value}"
             })
             
             return warning_msg
@@ -273,7 +316,7 @@ async def tap_element(element_id: str, *, by: Optional[LocatorStrategy] = None)
             "by": str(by) if by else "accessibility_id",
             "status": "success",
             "element_details": element_attributes,
-            "selector_used": f"{by_strategy}={element_id}"
+            "selector_used": f"{by_strategy}={locator_value}"
         })
         
         success_msg = f"Successfully tapped visible element with {by_strategy}: {element_id}"
@@ -283,7 +326,7 @@ async def tap_element(element_id: str, *, by: Optional[LocatorStrategy] = None)
     except Exception as e:
         error_msg = f"Failed to tap element: {str(e)}"
         logger.error(error_msg)
-        logger.debug(f"Stack trace: {traceback.format_exc()}")
+        logger.debug("Stack trace:", exc_info=True)
         print_error(error_msg)
         
         # Log the failed action
@@ -293,7 +336,7 @@ async def tap_element(element_id: str, *, by: Optional[LocatorStrategy] = None)
             "status": "failed",
             "reason": "error",
             "error": str(e),
-            "selector_used": f"{by_strategy}={element_id}"
+            "selector_used": f"{by_strategy}={locator_value}"
         })
         
         return error_msg
@@ -321,7 +364,7 @@ async def press_physical_button(button: PhysicalButton) -> str:
     except Exception as e:
         error_msg = f"Failed to press button: {str(e)}"
         logger.error(error_msg)
-        logger.debug(f"Stack trace: {traceback.format_exc()}")
+        logger.debug("Stack trace:", exc_info=True)
         print_error(error_msg)
         return error_msg
 
@@ -350,7 +393,7 @@ async def swipe(direction: SwipeDirection = None, start_x: Optional[int] = None,
         return message
     
     try:
-        window_size = ios_driver.driver.get_window_size()
+        window_size = ios_driver.get_window_size()
         width = window_size['width']
         height = window_size['height']
         
@@ -403,14 +446,8 @@ async def swipe(direction: SwipeDirection = None, start_x: Optional[int] = None,
             return success_msg
         else:
             # Use direction-based swiping
-            swipe_params = {
-                SwipeDirection.UP: (width * 0.5, height * 0.7, width * 0.5, height * 0.3),
-                SwipeDirection.DOWN: (width * 0.5, height * 0.3, width * 0.5, height * 0.7),
-                SwipeDirection.LEFT: (width * 0.8, height * 0.5, width * 0.2, height * 0.5),
-                SwipeDirection.RIGHT: (width * 0.2, height * 0.5, width * 0.8, height * 0.5)
-            }
-            
-            start_x, start_y, end_x, end_y = swipe_params[direction]
+            fx1, fy1, fx2, fy2 = SWIPE_FRACTIONS[direction]
+            start_x, start_y, end_x, end_y = width * fx1, height * fy1, width * fx2, height * fy2
             ios_driver.driver.swipe(start_x, start_y, end_x, end_y, 500)
             
             # Log successful action
@@ -433,7 +470,7 @@ async def swipe(direction: SwipeDirection = None, start_x: Optional[int] = None,
     except Exception as e:
         error_msg = f"Failed to perform swipe: {str(e)}"
         logger.error(error_msg)
-        logger.debug(f"Stack trace: {traceback.format_exc()}")
+        logger.debug("Stack trace:", exc_info=True)
         print_error(error_msg)
         
         # Log failed action
@@ -486,14 +523,13 @@ async def send_input(element_id: str, text: str, *, by: Optional[LocatorStrategy
         return message
     
     try:
-        locator_map = {
-            LocatorStrategy.ACCESSIBILITY_ID: AppiumBy.ACCESSIBILITY_ID,
-            LocatorStrategy.XPATH: AppiumBy.XPATH,
-            LocatorStrategy.NAME: AppiumBy.NAME,
-            LocatorStrategy.CLASS_NAME: AppiumBy.CLASS_NAME
-        }
-        
-        by_strategy = locator_map[by] if by else AppiumBy.ACCESSIBILITY_ID
+        by_strategy = LOCATOR_MAP[by] if by else AppiumBy.ACCESSIBILITY_ID
+        locator_value = element_id
+        if by == LocatorStrategy.XPATH:
+            # Prefer a native class chain query when the XPath has an exact equivalent
+            class_chain = xpath_to_class_chain(element_id)
+            if class_chain:
+                by_strategy, locator_value = AppiumBy.IOS_CLASS_CHAIN, class_chain
         
         # Update app state with current activity/view information
         try:
@@ -508,7 +544,7 @@ async def send_input(element_id: str, text: str, *, by: Optional[LocatorStrategy
             logger.debug(f"Could not get current app view: {str(e)}")
             
         try:
-            element = ios_driver.driver.find_element(by=by_strategy, value=element_id)
+            element = ios_driver.driver.find_element(by=by_strategy, value=locator_value)
         except Exception as e:
             error_msg = f"Element not found: {str(e)}"
             logger.warning(error_msg)
@@ -522,7 +558,7 @@ async def send_input(element_id: str, text: str, *, by: Optional[LocatorStrategy
                 "status": "failed",
                 "reason": "element_not_found",
                 "error": str(e),
-                "selector_used": f"{by_strategy}={element_id}"
+                "selector_used": f"{by_strategy}={locator_value}"
             })
             
             return error_msg
@@ -622,7 +658,7 @@ async def send_input(element_id: str, text: str, *, by: Optional[LocatorStrategy
             "text": text,
             "by": str(by) if by else "accessibility_id",
             "status": "success",
-            "selector_used": f"{by_strategy}={element_id}",
+            "selector_used": f"{by_strategy}={locator_value}",
             "field_state": {
                 "before": pre_input_attributes,
                 "after": post_input_attributes,
@@ -637,7 +673,7 @@ async def send_input(element_id: str, text: str, *, by: Optional[LocatorStrategy
     except Exception as e:
         error_msg = f"Failed to send input: {str(e)}"
         logger.error(error_msg)
-        logger.debug(f"Stack trace: {traceback.format_exc()}")
+        logger.debug("Stack trace:", exc_info=True)
         print_error(error_msg)
         
         # Log failed action
@@ -648,7 +684,7 @@ async def send_input(element_id: str, text: str, *, by: Optional[LocatorStrategy
             "status": "failed",
             "reason": "error",
             "error": str(e),
-            "selector_used": f"{by_strategy}={element_id}"
+            "selector_used": f"{by_strategy}={locator_value}"
         })
         
         return error_msg
@@ -689,7 +725,7 @@ async def navigate_to(url: str) -> str:
     except Exception as e:
         error_msg = f"Failed to navigate: {str(e)}"
         logger.error(error_msg)
-        logger.debug(f"Stack trace: {traceback.format_exc()}")
+        logger.debug("Stack trace:", exc_info=True)
         print_error(error_msg)
         
         # Log failed action
@@ -737,7 +773,7 @@ async def launch_app(bundle_id: str) -> str:
                 return success_msg
             except Exception as e:
                 logger.warning(f"Failed to relaunch app via existing driver: {str(e)}")
-                logger.debug(f"Stack trace: {traceback.format_exc()}")
+                logger.debug("Stack trace:", exc_info=True)
                 logger.info("Will try to re-initialize driver")
                 ios_driver.cleanup()
         
@@ -763,7 +799,7 @@ async def launch_app(bundle_id: str) -> str:
     except Exception as e:
         error_msg = f"Failed to launch app: {str(e)}"
         logger.error(error_msg)
-        logger.debug(f"Stack trace: {traceback.format_exc()}")
+        logger.debug("Stack trace:", exc_info=True)
         print_error(error_msg)
         return error_msg
 
@@ -806,7 +842,7 @@ async def take_screenshot() -> str:
         pagesource_dir.mkdir(parents=True, exist_ok=True)
         
         # Generate timestamp for both files
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = artifact_timestamp()
         screenshot_path = screenshots_dir / f"screenshot_{timestamp}.png"
         pagesource_path = pagesource_dir / f"pagesource_{timestamp}.xml"
         
@@ -845,7 +881,7 @@ async def take_screenshot() -> str:
     except Exception as e:
         error_msg = f"Failed to capture artifacts: {str(e)}"
         logger.error(error_msg)
-        logger.debug(f"Stack trace: {traceback.format_exc()}")
+        logger.debug("Stack trace:", exc_info=True)
         print_error(error_msg)
         
         # Log the failed action
@@ -874,7 +910,7 @@ async def end_action_trace() -> str:
     except Exception as e:
         error_msg = f"Failed to end action trace: {str(e)}"
         logger.error(error_msg)
-        logger.debug(f"Stack trace: {traceback.format_exc()}")
+        logger.debug("Stack trace:", exc_info=True)
         print_error(error_msg)
         return error_msg 
 
@@ -951,6 +987,6 @@ async def capture_network_request(url: str, method: str, status: Optional[int] =
     except Exception as e:
         error_msg = f"Failed to capture network request: {str(e)}"
         logger.error(error_msg)
-        logger.debug(f"Stack trace: {traceback.format_exc()}")
+        logger.debug("Stack trace:", exc_info=True)
         print_error(error_msg)
         return error_msg 
\ No newline at end of file
@@ -20,6 +20,7 @@ class AppiumConfig(BaseModel):
     signing_id: Optional[str] = Field("iPhone Developer", description="Code signing identity")
     wda_local_port: Optional[int] = Field(8100, description="WebDriverAgent local port")
     wda_bundle_id: Optional[str] = Field("com.facebook.WebDriverAgentRunner.xctrunner", description="WebDriverAgent bundle ID")
+    snapshot_max_depth: int = Field(30, description="Maximum depth of WebDriverAgent accessibility snapshots")
     
     @field_validator('port', 'wda_local_port')
     def port_must_be_valid(cls, v, info: FieldValidationInfo):
@@ -30,6 +31,13 @@ class AppiumConfig(BaseModel):
             return default
         return v
 
+    @field_validator('snapshot_max_depth')
+    def snapshot_depth_must_be_positive(cls, v):
+        if v <= 0:
+            logger.warning(f"Invalid snapshot_max_depth: {v}, using default 30")
+            return 30
+        return v
+
     @field_validator('udid')
     def validate_udid(cls, v):
         if v and not isinstance(v, str):
@@ -108,7 +116,8 @@ def load_config() -> Config:
                 team_id=os.getenv("IOS_TEAM_ID"),
                 signing_id=os.getenv("IOS_SIGNING_ID", "iPhone Developer"),
                 wda_local_port=int(os.getenv("WDA_LOCAL_PORT", "8100")),
-                wda_bundle_id=os.getenv("WDA_BUNDLE_ID", "com.facebook.WebDriverAgentRunner.xctrunner")
+                wda_bundle_id=os.getenv("WDA_BUNDLE_ID", "com.facebook.WebDriverAgentRunner.xctrunner"),
+                snapshot_max_depth=int(os.getenv("WDA_SNAPSHOT_MAX_DEPTH", "30"))
             )
         )
         
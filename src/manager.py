@@ -4,7 +4,6 @@ import asyncio
 import time
 import os
 import logging
-import traceback
 from typing import Optional, List, Dict, Any
 from dotenv import load_dotenv
 
@@ -97,7 +96,7 @@ class ScreenshotManager:
             except Exception as e:
                 error_msg = f"Error initializing Appium driver: {str(e)}"
                 logger.error(error_msg)
-                logger.debug(f"Stack trace: {traceback.format_exc()}")
+                logger.debug("Stack trace:", exc_info=True)
                 print_error(error_msg)
                 self.printer.update_item(
                     "appium",
@@ -149,7 +148,7 @@ class ScreenshotManager:
             except Exception as e:
                 error_msg = f"Error creating screenshot plan: {str(e)}"
                 logger.error(error_msg)
-                logger.debug(f"Stack trace: {traceback.format_exc()}")
+                logger.debug("Stack trace:", exc_info=True)
                 self.printer.update_item(
                     "planning",
                     f"[bold red]Failed to create plan: {str(e)}[/bold red]",
@@ -231,7 +230,7 @@ Start by launching the app and systematically work through each section. Use the
                         input_items = new_input_items
                     except Exception as e:
                         logger.error(f"Error converting screenshot result to input list: {str(e)}")
-                        logger.debug(f"Stack trace: {traceback.format_exc()}")
+                        logger.debug("Stack trace:", exc_info=True)
                         # If we can't convert, just keep the old input items
                         print_warning("Error processing screenshot results, using previous context")
 
@@ -282,7 +281,7 @@ Start by launching the app and systematically work through each section. Use the
                 except Exception as e:
                     error_msg = f"Error during iteration {iteration_count}: {str(e)}"
                     logger.error(error_msg)
-                    logger.debug(f"Stack trace: {traceback.format_exc()}")
+                    logger.debug("Stack trace:", exc_info=True)
                     self.printer.update_item(
                         "error",
                         f"[bold red]Error: {str(e)}[/bold red]",
@@ -322,7 +321,7 @@ Start by launching the app and systematically work through each section. Use the
             return create_default_evaluation()
         except Exception as e:
             logger.error(f"Error extracting coverage evaluation: {str(e)}")
-            logger.debug(f"Stack trace: {traceback.format_exc()}")
+            logger.debug("Stack trace:", exc_info=True)
             return create_default_evaluation()
             
     def _format_missing_areas(self, coverage_eval: CoverageEvaluation) -> str:
@@ -410,7 +409,7 @@ Start by launching the app and systematically work through each section. Use the
                         return result.final_output
                 except Exception as e:
                     logger.error(f"Error getting final output from screenshot agent: {str(e)}")
-                    logger.debug(f"Stack trace: {traceback.format_exc()}")
+                    logger.debug("Stack trace:", exc_info=True)
                     self.printer.update_item(
                         "error",
                         f"[bold red]Error getting final output from screenshot agent: {str(e)}[/bold red]",
@@ -420,7 +419,7 @@ Start by launching the app and systematically work through each section. Use the
                     return type('EmptyResult', (), {'to_input_list': lambda self: input_items})()
             except Exception as e:
                 logger.error(f"Error during screenshot capture: {str(e)}")
-                logger.debug(f"Stack trace: {traceback.format_exc()}")
+                logger.debug("Stack trace:", exc_info=True)
                 self.printer.update_item(
                     "error",
                     f"[bold red]Screenshot capture failed: {str(e)}[/bold red]",
@@ -498,7 +497,7 @@ Start by launching the app and systematically work through each section. Use the
                         return result.final_output
                 except Exception as e:
                     logger.error(f"Error getting final output from coverage agent: {str(e)}")
-                    logger.debug(f"Stack trace: {traceback.format_exc()}")
+                    logger.debug("Stack trace:", exc_info=True)
                     self.printer.update_item(
                         "error",
                         f"[bold red]Error getting final output from coverage agent: {str(e)}[/bold red]",
@@ -511,7 +510,7 @@ Start by launching the app and systematically work through each section. Use the
                     })()
             except Exception as e:
                 logger.error(f"Error during coverage evaluation: {str(e)}")
-                logger.debug(f"Stack trace: {traceback.format_exc()}")
+                logger.debug("Stack trace:", exc_info=True)
                 self.printer.update_item(
                     "error",
                     f"[bold red]Coverage evaluation failed: {str(e)}[/bold red]",
@@ -567,7 +566,7 @@ Start by launching the app and systematically work through each section. Use the
             except Exception as e:
                 error_msg = f"Error initializing Appium driver: {str(e)}"
                 logger.error(error_msg)
-                logger.debug(f"Stack trace: {traceback.format_exc()}")
+                logger.debug("Stack trace:", exc_info=True)
                 print_error(error_msg)
                 self.printer.update_item(
                     "appium",
@@ -596,5 +595,5 @@ Start by launching the app and systematically work through each section. Use the
             except Exception as e:
                 error_msg = f"Error during screenshot agent chat: {str(e)}"
                 logger.error(error_msg)
-                logger.debug(f"Stack trace: {traceback.format_exc()}")
+                logger.debug("Stack trace:", exc_info=True)
                 print_error(error_msg) 
\ No newline at end of file
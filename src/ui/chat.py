@@ -4,7 +4,6 @@ from typing import Any, Dict, List, Optional, Callable, Awaitable
 from rich.console import Console
 from rich.panel import Panel
 from rich.prompt import Prompt
-import traceback
 
 from agents import Runner, RunConfig, Agent
 from agents.items import ItemHelpers
@@ -188,7 +187,7 @@ class ChatInterface:
                 except Exception as e:
                     error_msg = f"Error getting response: {str(e)}"
                     logger.error(error_msg)
-                    logger.debug(f"Stack trace: {traceback.format_exc()}")
+                    logger.debug("Stack trace:", exc_info=True)
                     self._display_message("Error", error_msg, "red")
                 
         except KeyboardInterrupt:
@@ -196,7 +195,7 @@ class ChatInterface:
         except Exception as e:
             error_msg = f"Unexpected error in chat session: {str(e)}"
             logger.error(error_msg)
-            logger.debug(f"Stack trace: {traceback.format_exc()}")
+            logger.debug("Stack trace:", exc_info=True)
             self._display_message("Error", error_msg, "red")
         finally:
             if on_exit:
@@ -1,7 +1,6 @@
 from dataclasses import dataclass
 from typing import List, ClassVar, Optional
 import logging
-import traceback
 from rich.console import Console
 from rich.panel import Panel
 from rich.traceback import install
@@ -95,7 +94,7 @@ class CoverageEvaluation:
             self.completion_percentage = max(0.0, min(100.0, float(self.completion_percentage)))
         except Exception as e:
             logger.error(f"Error in CoverageEvaluation.__post_init__: {str(e)}")
-            logger.debug(f"Stack trace: {traceback.format_exc()}")
+            logger.debug("Stack trace:", exc_info=True)
             # Set safe defaults
             if not hasattr(self, 'score') or not self.score:
                 self.score = "incomplete"
@@ -188,7 +187,7 @@ def print_coverage_analysis(result: Optional[CoverageEvaluation]):
         logger.info(f"Coverage analysis: score={result.score}, completion={completion_percentage}, missing_areas={missing_areas_text}")
     except Exception as e:
         logger.error(f"Error printing coverage analysis: {str(e)}")
-        logger.debug(f"Stack trace: {traceback.format_exc()}")
+        logger.debug("Stack trace:", exc_info=True)
         try:
             print_error(f"Failed to display coverage analysis: {str(e)}")
         except:
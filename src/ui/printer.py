@@ -5,7 +5,6 @@ from rich.table import Table
 from rich.text import Text
 from datetime import datetime
 import logging
-import traceback
 from typing import Dict, Optional, List
 
 logger = logging.getLogger(__name__)
@@ -29,7 +28,7 @@ class Printer:
                 logger.info("Printer initialized with live display")
             except Exception as e:
                 logger.error(f"Failed to initialize live display: {str(e)}")
-                logger.debug(f"Stack trace: {traceback.format_exc()}")
+                logger.debug("Stack trace:", exc_info=True)
                 self.use_live_display = False
                 
         logger.info("Printer initialized successfully")
@@ -81,10 +80,10 @@ class Printer:
                     self._refresh_live_display()
                 except Exception as e:
                     logger.error(f"Failed to refresh live display: {str(e)}")
-                    logger.debug(f"Stack trace: {traceback.format_exc()}")
+                    logger.debug("Stack trace:", exc_info=True)
         except Exception as e:
             logger.error(f"Error in update_item: {str(e)}")
-            logger.debug(f"Stack trace: {traceback.format_exc()}")
+            logger.debug("Stack trace:", exc_info=True)
             # Last resort fallback
             try:
                 print(f"{datetime.now().strftime('%H:%M:%S')} {content}")
@@ -137,7 +136,7 @@ class Printer:
                 logger.warning(f"Attempted to mark non-existent item as done: {key}")
         except Exception as e:
             logger.error(f"Error in mark_item_done: {str(e)}")
-            logger.debug(f"Stack trace: {traceback.format_exc()}")
+            logger.debug("Stack trace:", exc_info=True)
 
     def _refresh_live_display(self):
         """Refresh the live display with current items."""
@@ -175,7 +174,7 @@ class Printer:
                 self.live.refresh()
         except Exception as e:
             logger.error(f"Error in _refresh_live_display: {str(e)}")
-            logger.debug(f"Stack trace: {traceback.format_exc()}")
+            logger.debug("Stack trace:", exc_info=True)
 
     def end(self):
         """Clean up and close the live display."""
@@ -192,7 +191,7 @@ class Printer:
                     logger.error(f"Error stopping live display: {str(e)}")
         except Exception as e:
             logger.error(f"Error ending printer: {str(e)}")
-            logger.debug(f"Stack trace: {traceback.format_exc()}")
+            logger.debug("Stack trace:", exc_info=True)
             try:
                 print("\nTerminating display...")
             except:
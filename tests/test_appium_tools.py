@@ -4,8 +4,10 @@ import pytest
 import asyncio
 import os
 import json
+import subprocess
 from pathlib import Path
 from typing import Optional, Any
+from selenium.common.exceptions import WebDriverException
 
 from src.appium.tools import (
     get_page_source,
@@ -18,9 +20,10 @@ from src.appium.tools import (
     take_screenshot,
     LocatorStrategy,
     PhysicalButton,
-    SwipeDirection
+    SwipeDirection,
+    xpath_to_class_chain
 )
-from src.appium.driver import ios_driver
+from src.appium.driver import IOSDriver, ios_driver
 from src.config import load_config
 from agents import RunContextWrapper
 
@@ -100,6 +103,83 @@ async def setup_driver(test_app_bundle_id):
     # Cleanup after tests
     ios_driver.cleanup()
 
+def test_xpath_to_class_chain():
+    """Test rewriting simple XPath locators into iOS class chain queries"""
+    assert xpath_to_class_chain("//XCUIElementTypeButton") == "**/XCUIElementTypeButton"
+    assert xpath_to_class_chain("//XCUIElementTypeCell[@name='Wi-Fi']") == '**/XCUIElementTypeCell[`name == "Wi-Fi"`]'
+    assert xpath_to_class_chain('//XCUIElementTypeStaticText[@label="General"]') == '**/XCUIElementTypeStaticText[`label == "General"`]'
+    
+    # Anything beyond a type with one string attribute stays XPath
+    assert xpath_to_class_chain("//XCUIElementTypeButton[contains(@name, 'OK')]") is None
+    assert xpath_to_class_chain("//XCUIElementTypeTable/XCUIElementTypeCell") is None
+    assert xpath_to_class_chain("//XCUIElementTypeButton[@name='Say \"hi\"']") is None
+
+def test_detect_real_device_retries_failed_query(monkeypatch):
+    """Test that a failed ideviceinfo query for a connected device is not cached"""
+    driver = IOSDriver()
+    monkeypatch.setattr("src.appium.driver.resolve_command", lambda command: f"/usr/bin/{command}")
+    
+    calls = []
+    def fake_run(args, **kwargs):
+        calls.append(args[0])
+        if args[0].endswith("idevice_id"):
+            return subprocess.CompletedProcess(args, 0, stdout="abc123\n", stderr="")
+        if calls.count(args[0]) == 1:
+            return subprocess.CompletedProcess(args, 1, stdout="", stderr="Could not connect to lockdownd")
+        return subprocess.CompletedProcess(args, 0, stdout="UniqueDeviceID: abc123\nDeviceName: Test iPhone\n", stderr="")
+    monkeypatch.setattr("src.appium.driver.subprocess.run", fake_run)
+    
+    assert driver.detect_real_device() is None
+    assert driver.detect_real_device()["udid"] == "abc123"
+    # Once a query succeeds, the result is reused while the same device stays connected
+    assert driver.detect_real_device()["udid"] == "abc123"
+    assert calls.count("/usr/bin/ideviceinfo") == 2
+
+class FakeSession:
+    """Stand-in for an Appium session, recording app lifecycle calls."""
+    def __init__(self, bundle_id: str, activate_error: Optional[Exception] = None):
+        self.capabilities = {"bundleId": bundle_id}
+        self.activate_error = activate_error
+        self.calls = []
+    
+    def terminate_app(self, bundle_id: str):
+        self.calls.append(("terminate", bundle_id))
+    
+    def activate_app(self, bundle_id: str):
+        self.calls.append(("activate", bundle_id))
+        if self.activate_error:
+            raise self.activate_error
+    
+    def quit(self):
+        self.calls.append(("quit",))
+
+@pytest.mark.parametrize("connected_udid, activate_error, reused", [
+    ("abc123", None, True),
+    ("def456", None, False),
+    ("abc123", WebDriverException("session is gone"), False),
+])
+def test_init_driver_session_reuse(monkeypatch, connected_udid, activate_error, reused):
+    """Test that init_driver restarts the app on a matching session and rebuilds otherwise"""
+    driver = IOSDriver()
+    session = FakeSession("com.example.app", activate_error)
+    driver.driver = session
+    driver.device_info = {"udid": "abc123", "name": "Test iPhone", "ios_version": "17.0", "product_type": ""}
+    monkeypatch.setattr(driver, "detect_real_device", lambda: {**driver.device_info, "udid": connected_udid})
+    
+    created = []
+    monkeypatch.setattr("src.appium.driver.webdriver.Remote", lambda **kwargs: created.append(kwargs) or object())
+    monkeypatch.setattr(driver, "_base_capabilities", lambda real_device: {"platformName": "iOS"})
+    
+    assert driver.init_driver("com.example.app")
+    if reused:
+        assert driver.driver is session
+        assert session.calls == [("terminate", "com.example.app"), ("activate", "com.example.app")]
+        assert not created
+    else:
+        assert driver.driver is not session
+        assert ("quit",) in session.calls
+        assert len(created) == 1
+
 @pytest.mark.asyncio
 @pytest.mark.appium
 @pytest.mark.integration